@@ -3,24 +3,128 @@ import re
 import shutil
 import tempfile
 import argparse
+import contextlib
+import errno
+import functools
 import glob
+import itertools
 import logging
+import queue
 import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional
-from moviepy import *
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
 from PIL import Image, ImageSequence
 
+# Animations with more raw RGBA data than this are staged on disk instead of RAM
+MAX_IN_MEMORY_FRAME_BYTES = 512 * 2**20
+
+# Encoders tried in order when no codec is requested, GPU encoders first
+PREFERRED_CODECS = ['h264_nvenc', 'h264_qsv', 'libsvtav1', 'libx264']
+
+# Encoders that need working hardware, not just support compiled into FFmpeg,
+# mapped to a driver tool that must be on PATH before a test encode is tried
+HARDWARE_CODECS = {'h264_nvenc': 'nvidia-smi', 'h264_qsv': None}
+
+# Consumer GPUs limit concurrent encode sessions and FFmpeg fails once the
+# limit is hit, so parallel jobs on a hardware encoder are capped to this
+MAX_HARDWARE_JOBS = 2
+
+# Fast default tuning per encoder, quality targets are roughly comparable
+ENCODER_SETTINGS = {
+    # NVENC accepts RGBA itself, so the YUV conversion runs on the GPU, not in swscale.
+    # Forced IDR makes the split keyframe a key packet the segment muxer can cut on,
+    # by default both GPU encoders may force a non-IDR intra frame instead.
+    'h264_nvenc': {
+        'preset': 'p4',
+        'params': ['-tune', 'hq', '-rc', 'vbr', '-cq', '23', '-forced-idr', '1'],
+        'pix_fmt': None
+    },
+    'h264_qsv': {'preset': 'veryfast', 'params': ['-global_quality', '23', '-forced_idr', '1'], 'pix_fmt': 'nv12'},
+    'libsvtav1': {'preset': '12', 'params': ['-crf', '35']},
+    # Sliced threads and no sync lookahead keep x264 threads busy on short clips
+    'libx264': {
+        'preset': 'ultrafast',
+        'params': ['-crf', '23', '-tune', 'fastdecode', '-x264-params', 'sliced-threads=1:sync-lookahead=0']
+    },
+    'libx265': {'preset': 'ultrafast', 'params': ['-crf', '28']},
+}
+
+# Moov atom ahead of the media data, so players can start before the download ends
+MP4_MUX_ARGS = ['-movflags', '+faststart']
+
+# 4:2:0 encoders need even dimensions, odd sizes lose their last row/column
+EVEN_CROP_FILTER = "crop=trunc(iw/2)*2:trunc(ih/2)*2:0:0"
+
+# Splits digit runs out of file names for natural sorting
+_NATSORT_RE = re.compile(r'([0-9]+)')
+
+# Bitrate differs between otherwise identical streams, so it is ignored when comparing them
+_BITRATE_RE = re.compile(r',? *[0-9]+ kb/s')
+
+def natural_sort_key(s) -> List:
+    """Sort key ordering embedded numbers numerically (a2 before a10)."""
+    # The capture group puts ASCII digit runs at odd indices; isdigit() would
+    # also accept digits like superscript two that int() rejects
+    return [int(part) if i % 2 else part.lower() for i, part in enumerate(_NATSORT_RE.split(str(s)))]
+
+def _prefetch(items: Iterable, depth: int = 8) -> Iterator:
+    """
+    Iterates items on a producer thread, so the next one is produced while
+    the caller handles the current one (PIL decoding and file or pipe writes
+    release the GIL).
+    
+    Close the iterator when stopping early, e.g. with contextlib.closing, so
+    the bounded queue is drained and the producer thread can finish.
+    
+    Args:
+        items: Iterable to consume, e.g. a lazy frame generator
+        depth: Number of items buffered ahead of the caller
+        
+    Yields:
+        The items in order; an error raised by items is re-raised after the last one
+    """
+    item_queue = queue.Queue(maxsize=depth)
+    errors = []
+    end = object()  # Sentinel, items may contain None
+    
+    def produce():
+        try:
+            for item in items:
+                item_queue.put(item)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            item_queue.put(end)
+            
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    item = None
+    try:
+        while (item := item_queue.get()) is not end:
+            yield item
+    finally:
+        # Drain when the caller stopped early so the producer can finish
+        while item is not end:
+            item = item_queue.get()
+        producer.join()
+        
+    if errors:
+        raise errors[0]
+
 def configure_logging(log_to_file: bool = False):
     """Configure logging with optional file output."""
     handlers = [logging.StreamHandler()]
     if log_to_file:
         handlers.append(logging.FileHandler("webp_converter.log"))
     
+    # force replaces handlers a forked pool worker or an importing app already has
     logging.basicConfig(
         level=logging.INFO,
         format="%(asctime)s - %(levelname)s - %(message)s",
-        handlers=handlers
+        handlers=handlers,
+        force=True
     )
 
 class ImageAnalyzer:
@@ -31,6 +135,9 @@ class ImageAnalyzer:
         """
         Analyzes an animated image to determine its properties.
         
+        Results are cached per file path, size and modification time, so
+        repeated calls for an unchanged file skip decoding it again.
+        
         Args:
             image_path: Path to the image file
             
@@ -42,48 +149,174 @@ class ImageAnalyzer:
             - duration: Total duration in milliseconds (if available)
             - format: Image format (WEBP)
         """
+        stat = os.stat(image_path)
+        image_info = ImageAnalyzer._analyze_cached(os.path.abspath(image_path), stat.st_mtime_ns, stat.st_size)
+        return dict(image_info)  # Callers may modify their copy
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _analyze_cached(image_path: str, mtime_ns: int, file_size: int) -> Dict:
+        """Uncached analysis, the stat fields only form part of the cache key."""
         logging.info(f"Analyzing image: {image_path}")
         
         with Image.open(image_path) as img:
-            image_info = {
-                'size': img.size,
-                'mode': 'full',
-                'frame_count': 1,
-                'duration': 0,
-                'format': img.format
-            }
-            
-            # Check if image is animated
-            if not getattr(img, 'is_animated', False):
-                return image_info
-                
-            image_info['frame_count'] = img.n_frames if hasattr(img, 'n_frames') else 0
+            return ImageAnalyzer._analyze_open(img)
+    
+    @staticmethod
+    def _analyze_open(img: Image.Image) -> Dict:
+        """Analyzes an already opened image, see analyze_image for the fields."""
+        image_info = {
+            'size': img.size,
+            'mode': 'full',
+            'frame_count': 1,
+            'duration': 0,
+            'format': img.format
+        }
+        
+        # Check if image is animated
+        if not getattr(img, 'is_animated', False):
+            return image_info
             
-            try:
-                durations = []
-                for frame in ImageSequence.Iterator(img):
-                    durations.append(frame.info.get('duration', 0))
-                    
-                    # Check for partial updates
-                    if frame.tile:
-                        tile = frame.tile[0]
-                        if tile[1][2:] != img.size:
-                            image_info['mode'] = 'partial'
-                            break
+        image_info['frame_count'] = img.n_frames if hasattr(img, 'n_frames') else 0
+        
+        try:
+            durations = []
+            for frame in ImageSequence.Iterator(img):
+                durations.append(frame.info.get('duration', 0))
                 
-                image_info['duration'] = sum(durations)
-                if image_info['frame_count'] == 0:
-                    image_info['frame_count'] = len(durations)
-                    
-            except Exception as e:
-                logging.warning(f"Error analyzing image frames: {e}")
+                # Check for partial updates
+                if frame.tile:
+                    tile = frame.tile[0]
+                    if tile[1][2:] != img.size:
+                        image_info['mode'] = 'partial'
+                        break
+            
+            image_info['duration'] = sum(durations)
+            if image_info['frame_count'] == 0:
+                image_info['frame_count'] = len(durations)
                 
+        except Exception as e:
+            logging.warning(f"Error analyzing image frames: {e}")
+            
         logging.debug(f"Image analysis results: {image_info}")
         return image_info
 
 class FrameExtractor:
     """Handles efficient extraction of frames from animated images."""
     
+    @staticmethod
+    def is_animated(img: Image.Image) -> bool:
+        """Checks for more than one frame from the header, without decoding frames."""
+        return getattr(img, 'is_animated', False) and getattr(img, 'n_frames', 1) > 1
+    
+    @staticmethod
+    def is_opaque(frame: Image.Image, rgba: Image.Image) -> bool:
+        """Checks whether compositing would be a no-op because no pixel is transparent."""
+        if 'A' not in frame.getbands() and 'transparency' not in frame.info:
+            return True
+        # A single-band min/max scan is far cheaper than a full alpha composite
+        return rgba.getchannel('A').getextrema()[0] == 255
+    
+    @staticmethod
+    def iter_frames(img: Image.Image) -> Iterator[Image.Image]:
+        """
+        Yields fully composed RGBA frames from an already opened animated image.
+        
+        Partial frame updates are detected while iterating, so the animation
+        is only decoded once. Partial frames only convert and composite the
+        rectangle that changed since the previous frame.
+        
+        Partial frames are composed on one reused canvas instead of a fresh
+        copy per frame, so a yielded image is only valid until the next one
+        is requested; copy it to keep it longer.
+        
+        Args:
+            img: Opened PIL image
+            
+        Yields:
+            RGBA frame images in playback order
+        """
+        mode = 'full'
+        canvas_box = (0, 0) + img.size
+        canvas = None  # Previous composed frame, updated in place in partial mode
+        last_box = canvas_box
+        
+        for frame in ImageSequence.Iterator(img):
+            # Tile extents are only available before the frame is loaded
+            box = frame.tile[0][1] if frame.tile else canvas_box
+            
+            # Switch to compositing once a frame only updates part of the canvas
+            if mode == 'full' and box[2:] != img.size:
+                mode = 'partial'
+                
+            # Disposal of the previous frame can also repaint its rectangle
+            dirty_box = (
+                min(box[0], last_box[0]),
+                min(box[1], last_box[1]),
+                max(box[2], last_box[2]),
+                max(box[3], last_box[3])
+            )
+            
+            # Handle partial frame updates
+            if mode == 'partial' and canvas is not None and dirty_box != canvas_box:
+                patch = frame.crop(dirty_box).convert('RGBA')
+                if FrameExtractor.is_opaque(frame, patch):
+                    canvas.paste(patch, dirty_box[:2])
+                else:
+                    canvas.alpha_composite(patch, dirty_box[:2])
+            else:
+                # convert() always returns a new image, so the decoder's frame is never modified
+                rgba = frame.convert('RGBA')
+                if mode == 'partial' and canvas is not None and not FrameExtractor.is_opaque(frame, rgba):
+                    canvas.alpha_composite(rgba)
+                else:
+                    canvas = rgba
+            
+            yield canvas
+            last_box = box
+    
+    @staticmethod
+    def spill_frames(img: Image.Image, output_path: Path) -> int:
+        """
+        Writes all composed frames of an opened image back to back as raw RGBA.
+        
+        Unlike extract_frames there is no image format to encode and parse
+        again, FFmpeg reads the file with -f rawvideo.
+        
+        Args:
+            img: Opened animated image
+            output_path: File to write the frames to
+            
+        Returns:
+            Number of frames written
+        """
+        # Decode on a producer thread so PIL work overlaps with the file writes
+        decoded = _prefetch(frame.tobytes() for frame in FrameExtractor.iter_frames(img))
+        frame_count = 0
+        with contextlib.closing(decoded), open(output_path, 'wb') as f:
+            for frame_bytes in decoded:
+                f.write(frame_bytes)
+                frame_count += 1
+        return frame_count
+    
+    @staticmethod
+    def read_spilled_frames(spill_path: Path, frame_bytes: int, order: Iterable[int]) -> Iterator[bytes]:
+        """
+        Reads frames written by spill_frames back in any order, one at a time.
+        
+        Args:
+            spill_path: File written by spill_frames
+            frame_bytes: Size of one raw RGBA frame
+            order: Frame indices in the order to yield them
+            
+        Yields:
+            Raw RGBA frame buffers
+        """
+        with open(spill_path, 'rb') as f:
+            for index in order:
+                f.seek(index * frame_bytes)
+                yield f.read(frame_bytes)
+    
     @staticmethod
     def extract_frames(image_path: str, output_dir: str) -> List[str]:
         """
@@ -98,32 +331,21 @@ class FrameExtractor:
         """
         logging.info(f"Extracting frames from: {image_path}")
         
-        image_info = ImageAnalyzer.analyze_image(image_path)
-        if image_info['frame_count'] <= 1:
-            logging.warning("Image is not animated or contains only one frame")
-            return []
-            
         frame_paths = []
         temp_dir = Path(output_dir)
-        temp_dir.mkdir(parents=True, exist_ok=True)
         
         try:
             with Image.open(image_path) as img:
-                last_frame = img.convert('RGBA')
-                
-                for frame_index, frame in enumerate(ImageSequence.Iterator(img)):
-                    frame_filename = temp_dir / f"{Path(image_path).stem}-{frame_index:04d}.png"
-                    
-                    # Handle partial frame updates
-                    if image_info['mode'] == 'partial':
-                        new_frame = last_frame.copy()
-                        new_frame.paste(frame, (0, 0), frame.convert('RGBA'))
-                    else:
-                        new_frame = frame.convert('RGBA')
+                if not FrameExtractor.is_animated(img):
+                    logging.warning("Image is not animated or contains only one frame")
+                    return []
                     
+                temp_dir.mkdir(parents=True, exist_ok=True)
+                stem = Path(image_path).stem
+                for frame_index, new_frame in enumerate(FrameExtractor.iter_frames(img)):
+                    frame_filename = temp_dir / f"{stem}-{frame_index:04d}.png"
                     new_frame.save(frame_filename, 'PNG')
                     frame_paths.append(str(frame_filename))
-                    last_frame = new_frame
                     
         except Exception as e:
             logging.error(f"Error extracting frames: {e}")
@@ -142,16 +364,357 @@ class VideoConverter:
     """Handles conversion of image sequences to video formats."""
     
     @staticmethod
-    def loop_frames(frames: List[str]) -> List[str]:
+    def loop_frames(frames: List) -> List:
         """Creates a ping-pong loop by appending the reversed entire frame sequence."""
         # Append reversed frames to create seamless forward-backward loop
         return frames + list(reversed(frames))
 
     @staticmethod
-    def reverse_frames(frames: List[str]) -> List[str]:
+    def reverse_frames(frames: List) -> List:
         """Reverses frame order from last to first."""
         return list(reversed(frames))
 
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def available_encoders() -> frozenset:
+        """Lists the video encoders compiled into the FFmpeg binary on PATH."""
+        try:
+            result = subprocess.run(
+                ['ffmpeg', '-hide_banner', '-encoders'],
+                check=True, capture_output=True, text=True
+            )
+        except (OSError, subprocess.CalledProcessError):
+            return frozenset()
+            
+        # Encoder lines look like " V....D libx264   libx264 H.264 / AVC ..."
+        encoders = set()
+        for line in result.stdout.splitlines():
+            fields = line.split()
+            if len(fields) >= 2 and fields[0].startswith('V'):
+                encoders.add(fields[1])
+        return frozenset(encoders)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def encoder_works(codec: str) -> bool:
+        """Test-encodes one blank frame to check the encoder's hardware is usable."""
+        cmd = [
+            'ffmpeg',
+            '-hide_banner',
+            '-f', 'lavfi',
+            '-i', 'color=size=256x256:duration=0.1',
+            '-frames:v', '1',
+            *VideoConverter.encoder_args(codec),
+            '-f', 'null',
+            '-'
+        ]
+        try:
+            subprocess.run(cmd, check=True, capture_output=True, timeout=30)
+        except (OSError, subprocess.SubprocessError):
+            return False
+        return True
+
+    @staticmethod
+    def select_codec() -> str:
+        """Picks the fastest preferred encoder FFmpeg supports, falling back to libx264."""
+        available = VideoConverter.available_encoders()
+        for codec in PREFERRED_CODECS:
+            if codec not in available:
+                continue
+            if codec in HARDWARE_CODECS:
+                driver_tool = HARDWARE_CODECS[codec]
+                if driver_tool and shutil.which(driver_tool) is None:
+                    logging.debug(f"Skipping {codec}: {driver_tool} not found")
+                    continue
+                if not VideoConverter.encoder_works(codec):
+                    logging.debug(f"Skipping {codec}: no usable hardware")
+                    continue
+            return codec
+        return 'libx264'
+
+    @staticmethod
+    def encoder_args(
+        codec: Optional[str] = None,
+        encoder_preset: Optional[str] = None,
+        threads: int = 0
+    ) -> List[str]:
+        """
+        Builds the FFmpeg output codec arguments for a video encoder.
+        
+        Args:
+            codec: FFmpeg video encoder (None = fastest available)
+            encoder_preset: Encoder speed preset (None = codec default)
+            threads: Encoder threads (0 = FFmpeg decides)
+            
+        Returns:
+            FFmpeg arguments selecting and tuning the encoder
+        """
+        codec = codec or VideoConverter.select_codec()
+        settings = ENCODER_SETTINGS.get(codec, {})
+        args = ['-c:v', codec]
+        
+        preset = encoder_preset or settings.get('preset')
+        if preset:
+            args += ['-preset', preset]
+        args += settings.get('params', [])
+        
+        pix_fmt = settings.get('pix_fmt', 'yuv420p')
+        if pix_fmt:
+            args += ['-pix_fmt', pix_fmt]
+        args += ['-threads', str(threads)]
+        return args
+
+    @staticmethod
+    def apply_effects(frames: List, loop_video: bool = False, reverse_video: bool = False) -> List:
+        """Applies the ping-pong loop and then the reverse effect if requested."""
+        if loop_video:
+            frames = VideoConverter.loop_frames(frames)
+        if reverse_video:
+            frames = VideoConverter.reverse_frames(frames)
+        return frames
+
+    @staticmethod
+    def _pipe_frames_to_ffmpeg(
+        frames: Iterable[bytes],
+        frame_size: Tuple[int, int],
+        frame_rate: int,
+        output_path: Path,
+        encoder_args: List[str],
+        output_args: Optional[List[str]] = None
+    ) -> int:
+        """
+        Streams raw RGBA frames straight into an FFmpeg encoder process.
+        
+        Args:
+            frames: Raw RGBA frame buffers, may be a lazy generator
+            frame_size: (width, height) of every frame
+            frame_rate: Frames per second for output video
+            output_path: Path for the encoded video
+            encoder_args: Output codec arguments from encoder_args()
+            output_args: Muxer arguments placed before the output path (None = MP4_MUX_ARGS)
+            
+        Returns:
+            Number of frames written
+        """
+        width, height = frame_size
+        cmd = [
+            'ffmpeg',
+            '-y',  # Overwrite output
+            '-loglevel', 'error',
+            '-f', 'rawvideo',
+            '-pix_fmt', 'rgba',
+            '-s', f"{width}x{height}",
+            '-r', str(frame_rate),
+            '-i', 'pipe:0',  # Frames arrive on stdin
+            '-vf', EVEN_CROP_FILTER,
+            *encoder_args,
+            *(MP4_MUX_ARGS if output_args is None else output_args),
+            str(output_path)
+        ]
+        
+        # Consume frames on a producer thread so PIL decoding overlaps with the encode
+        queued = _prefetch(frames)
+        frame_count = 0
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            with contextlib.closing(queued):
+                for frame_bytes in queued:
+                    try:
+                        proc.stdin.write(frame_bytes)
+                        frame_count += 1
+                    except OSError as e:
+                        # FFmpeg exited early, its stderr explains why; Windows
+                        # reports the closed pipe as EINVAL instead of EPIPE
+                        if not isinstance(e, BrokenPipeError) and e.errno != errno.EINVAL:
+                            raise
+                        break
+        finally:
+            _, stderr = proc.communicate()
+            
+        if proc.returncode != 0:
+            raise subprocess.CalledProcessError(proc.returncode, cmd, stderr=stderr.decode(errors='replace'))
+            
+        return frame_count
+
+    @staticmethod
+    def _pipe_split_to_ffmpeg(
+        frames: Iterable[bytes],
+        split_frame: int,
+        frame_size: Tuple[int, int],
+        frame_rate: int,
+        output_dir: Path,
+        base_name: str,
+        encoder_args: List[str]
+    ) -> List[str]:
+        """
+        Encodes one frame stream into two videos split at an exact frame.
+        
+        A keyframe is forced at the split so the segment muxer can cut the
+        single encode without a second encoder pass.
+        
+        Args:
+            frames: Raw RGBA frame buffers, may be a lazy generator
+            split_frame: Index of the first frame of the second video
+            frame_size: (width, height) of every frame
+            frame_rate: Frames per second for output video
+            output_dir: Directory for the segment files
+            base_name: Output name stem, files are <base_name>_part1/2.mp4
+            encoder_args: Output codec arguments from encoder_args()
+            
+        Returns:
+            Paths of the two segment files
+        """
+        VideoConverter._pipe_frames_to_ffmpeg(
+            frames,
+            frame_size,
+            frame_rate,
+            output_dir / f"{base_name.replace('%', '%%')}_part%d.mp4",
+            encoder_args,
+            output_args=VideoConverter._segment_args(split_frame)
+        )
+        return [str(output_dir / f"{base_name}_part{i}.mp4") for i in (1, 2)]
+
+    @staticmethod
+    def _segment_args(split_frame: int) -> List[str]:
+        """Output arguments that cut one encode into _part1/_part2 files at an exact frame."""
+        return [
+            # Split on a frame number, float times can land a frame off
+            '-force_key_frames', f"expr:eq(n,{split_frame})",
+            '-f', 'segment',
+            '-segment_frames', str(split_frame),
+            '-segment_start_number', '1',
+            '-reset_timestamps', '1',
+            # MP4_MUX_ARGS for every segment file, the segment muxer does not forward -movflags
+            '-segment_format_options', 'movflags=+faststart'
+        ]
+
+    @staticmethod
+    def _segments_graph(
+        frame_total: int,
+        split_index: int,
+        loop_video: bool = False,
+        reverse_video: bool = False,
+        input_filters: str = "null"
+    ) -> Tuple[str, Optional[int]]:
+        """
+        Builds a filter graph that cuts [0:v] into segments and applies effects.
+        
+        Each segment is trimmed, looped and reversed on its own, then all are
+        concatenated into [out] for a single encode.
+        
+        Args:
+            frame_total: Number of frames in the input
+            split_index: First frame of the second segment (no split if out of range)
+            loop_video: Whether to loop each segment by appending it reversed
+            reverse_video: Whether to reverse each segment
+            input_filters: Filters applied to the input before cutting
+            
+        Returns:
+            Filter graph ending in [out], and the output frame where the second
+            segment starts (None = single segment)
+        """
+        if 0 < split_index < frame_total:
+            bounds = [(0, split_index), (split_index, frame_total)]
+        else:
+            bounds = [(0, frame_total)]
+            
+        graph = f"[0:v]{input_filters},split={len(bounds)}"
+        graph += "".join(f"[in{i}]" for i in range(len(bounds))) + ";"
+        for i, (start, end) in enumerate(bounds):
+            graph += f"[in{i}]trim=start_frame={start}:end_frame={end},setpts=PTS-STARTPTS"
+            if loop_video:
+                graph += f",split[fwd{i}][bwd{i}];[bwd{i}]reverse[rev{i}];[fwd{i}][rev{i}]concat=n=2:v=1:a=0"
+            if reverse_video:
+                graph += ",reverse"
+            graph += f"[seg{i}];"
+        graph += "".join(f"[seg{i}]" for i in range(len(bounds)))
+        graph += f"concat=n={len(bounds)}:v=1:a=0,{EVEN_CROP_FILTER}[out]"
+        
+        if len(bounds) == 1:
+            return graph, None
+        return graph, split_index * (2 if loop_video else 1)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def ffmpeg_decodes_animated_webp() -> bool:
+        """Checks whether FFmpeg on PATH can decode every frame of an animated WebP."""
+        with tempfile.TemporaryDirectory() as probe_dir:
+            probe_path = os.path.join(probe_dir, 'probe.webp')
+            frames = [Image.new('RGBA', (16, 16), (255 * i, 0, 0, 255)) for i in range(2)]
+            frames[0].save(probe_path, save_all=True, append_images=frames[1:], duration=100)
+            try:
+                result = subprocess.run(
+                    ['ffmpeg', '-v', 'error', '-i', probe_path, '-f', 'framecrc', '-'],
+                    check=True, capture_output=True, text=True, timeout=30
+                )
+            except (OSError, subprocess.SubprocessError):
+                return False
+                
+        # framecrc prints one line per decoded frame after '#' header lines
+        decoded = [line for line in result.stdout.splitlines() if line and not line.startswith('#')]
+        return len(decoded) == 2
+
+    @staticmethod
+    def _encode_with_graph(
+        input_args: List[str],
+        frame_total: int,
+        split_index: int,
+        frame_rate: int,
+        output_dir: Path,
+        base_name: str,
+        encoder_args: List[str],
+        loop_video: bool = False,
+        reverse_video: bool = False,
+        input_filters: str = "null"
+    ) -> List[str]:
+        """
+        Encodes all segments of an FFmpeg-readable input with one FFmpeg process.
+        
+        Splitting, looping and reversing happen in the filter graph, and the
+        segment muxer writes both parts of a split from the same encode.
+        
+        Args:
+            input_args: FFmpeg arguments opening the input as stream 0
+            frame_total: Number of frames in the input
+            split_index: First frame of the second video (no split if out of range)
+            frame_rate: Frames per second for output video
+            output_dir: Directory for output files
+            base_name: Output name stem, files are <base_name>_partN.mp4
+            encoder_args: Output codec arguments from encoder_args()
+            loop_video: Whether to loop by reversing entire sequence
+            reverse_video: Whether to reverse playback
+            input_filters: Filters applied to the input before cutting
+            
+        Returns:
+            List of output file paths
+        """
+        graph, split_frame = VideoConverter._segments_graph(
+            frame_total,
+            split_index,
+            loop_video,
+            reverse_video,
+            input_filters=input_filters
+        )
+        cmd = [
+            'ffmpeg',
+            '-y',  # Overwrite output
+            '-loglevel', 'error',
+            *input_args,
+            '-filter_complex', graph,
+            '-map', '[out]',
+            '-r', str(frame_rate),
+            *encoder_args
+        ]
+        if split_frame is None:
+            output_files = [str(output_dir / f"{base_name}_part1.mp4")]
+            cmd += [*MP4_MUX_ARGS, output_files[0]]
+        else:
+            output_files = [str(output_dir / f"{base_name}_part{i}.mp4") for i in (1, 2)]
+            cmd += [*VideoConverter._segment_args(split_frame), str(output_dir / f"{base_name.replace('%', '%%')}_part%d.mp4")]
+            
+        subprocess.run(cmd, check=True, capture_output=True, text=True)
+        return output_files
+
     @staticmethod
     def convert_to_mp4(
         source_file: str,
@@ -159,7 +722,10 @@ class VideoConverter:
         split_ratio: int = 100,
         output_dir: Optional[str] = None,
         loop_video: bool = False,
-        reverse_video: bool = False
+        reverse_video: bool = False,
+        threads: int = 0,
+        codec: Optional[str] = None,
+        encoder_preset: Optional[str] = None
     ) -> Optional[List[str]]:
         """
         Converts an animated image to MP4 video(s).
@@ -171,82 +737,175 @@ class VideoConverter:
             output_dir: Directory for output files (None = current dir)
             loop_video: Whether to loop by reversing entire sequence
             reverse_video: Whether to reverse playback
+            threads: Encoder threads per video (0 = FFmpeg decides)
+            codec: FFmpeg video encoder (None = fastest available)
+            encoder_preset: Encoder speed preset (None = codec default)
             
         Returns:
             List of output file paths or None if conversion failed
         """
         logging.info(f"Starting conversion of {source_file}")
         
-        temp_dir = tempfile.mkdtemp()
+        if shutil.which('ffmpeg') is None:
+            logging.error("FFmpeg not found on PATH - conversion aborted")
+            return None
+            
+        temp_dir = None
         output_files = []
+        codec = codec or VideoConverter.select_codec()
+        encoder_args = VideoConverter.encoder_args(codec, encoder_preset, threads)
         
         try:
-            # Extract frames
-            frames = FrameExtractor.extract_frames(source_file, temp_dir)
-            if not frames:
-                logging.error("No frames extracted - conversion aborted")
-                return None
-                
-            # Calculate split points
-            split_index = int(len(frames) * (split_ratio / 100))
-            segments = [frames[:split_index]]
-            if split_index < len(frames):
-                segments.append(frames[split_index:])
-                
             # Prepare output directory
             output_dir = Path(output_dir) if output_dir else Path.cwd()
             output_dir.mkdir(parents=True, exist_ok=True)
             base_name = Path(source_file).stem
             
-            # Process each segment
-            for i, segment in enumerate(segments, 1):
-                output_path = output_dir / f"{base_name}_part{i}.mp4"
-                
-                logging.info(f"Creating video segment {i} with {len(segment)} frames")
+            with Image.open(source_file) as img:
+                if not FrameExtractor.is_animated(img):
+                    logging.error("Image is not animated - conversion aborted")
+                    return None
+                    
+                frame_size = img.size
+                frame_total = img.n_frames
+                frame_bytes = frame_size[0] * frame_size[1] * 4
+                raw_bytes = frame_bytes * frame_total
+                split_index = int(frame_total * (split_ratio / 100))
                 
-                # Apply looping or reversing if requested
-                processed_frames = segment
-                if loop_video:
-                    logging.info("Applying loop effect (ping-pong)")
-                    processed_frames = VideoConverter.loop_frames(processed_frames)
-                if reverse_video:
-                    logging.info("Applying reverse effect")
-                    processed_frames = VideoConverter.reverse_frames(processed_frames)
-
-                clip = ImageSequenceClip(processed_frames, fps=frame_rate)
+                # FFmpeg 8+ decodes animated WebP itself, keeping Python out of the frame path
+                # FFmpeg's reverse filter buffers whole segments, so only hand
+                # it the file when that fits the in-memory budget
+                fits_in_memory = not (loop_video or reverse_video) or raw_bytes <= MAX_IN_MEMORY_FRAME_BYTES
+                if img.format == 'WEBP' and fits_in_memory and VideoConverter.ffmpeg_decodes_animated_webp():
+                    logging.info("Decoding animated WebP natively with FFmpeg")
+                    # Every source frame becomes one output frame, ignoring per-frame durations
+                    return VideoConverter._encode_with_graph(
+                        ['-i', source_file],
+                        frame_total,
+                        split_index,
+                        frame_rate,
+                        output_dir,
+                        base_name,
+                        encoder_args,
+                        loop_video=loop_video,
+                        reverse_video=reverse_video,
+                        input_filters=f"settb=1/{frame_rate},setpts=N"
+                    )
+                    
+                # Frames in playback order: stream them to FFmpeg without buffering
+                if not loop_video and not reverse_video:
+                    frame_stream = (frame.tobytes() for frame in FrameExtractor.iter_frames(img))
+                    if 0 < split_index < frame_total:
+                        logging.info(f"Creating video segments with {split_index} and {frame_total - split_index} frames")
+                        return VideoConverter._pipe_split_to_ffmpeg(
+                            frame_stream,
+                            split_index,
+                            frame_size,
+                            frame_rate,
+                            output_dir,
+                            base_name,
+                            encoder_args
+                        )
+                        
+                    output_path = output_dir / f"{base_name}_part1.mp4"
+                    frame_count = VideoConverter._pipe_frames_to_ffmpeg(
+                        frame_stream,
+                        frame_size,
+                        frame_rate,
+                        output_path,
+                        encoder_args
+                    )
+                    logging.info(f"Created video {output_path} with {frame_count} frames")
+                    return [str(output_path)]
+                    
+                # Keep raw frames in memory when they fit, so no temp files are needed
+                if raw_bytes <= MAX_IN_MEMORY_FRAME_BYTES:
+                    frames = [frame.tobytes() for frame in FrameExtractor.iter_frames(img)]
+                    read_frames = iter  # The frames already are the buffers
+                else:
+                    # Too big for RAM: spill the frames, then read them back one at a time in playback order
+                    logging.info(f"Frames need {raw_bytes // 2**20} MB of RAM, staging them on disk")
+                    temp_dir = tempfile.mkdtemp()
+                    raw_path = Path(temp_dir) / f"{base_name}.rgba"
+                    frames = list(range(FrameExtractor.spill_frames(img, raw_path)))
+                    read_frames = functools.partial(FrameExtractor.read_spilled_frames, raw_path, frame_bytes)
+                    
+            # Calculate split point
+            split_index = int(len(frames) * (split_ratio / 100))
+            if loop_video:
+                logging.info("Applying loop effect (ping-pong)")
+            if reverse_video:
+                logging.info("Applying reverse effect")
                 
-                # Optimize video writing
-                clip.write_videofile(
-                    str(output_path),
-                    codec="libx264",
-                    threads=4,
-                    preset="ultrafast",
-                    ffmpeg_params=["-crf", "23", "-pix_fmt", "yuv420p"],
-                    logger=None  # Disable moviepy progress bars
+            # Encode both segments as one stream, no second encoder
+            if 0 < split_index < len(frames):
+                segments = [
+                    VideoConverter.apply_effects(segment, loop_video, reverse_video)
+                    for segment in (frames[:split_index], frames[split_index:])
+                ]
+                logging.info(f"Creating video segments with {len(segments[0])} and {len(segments[1])} frames")
+                return VideoConverter._pipe_split_to_ffmpeg(
+                    read_frames(itertools.chain(*segments)),
+                    len(segments[0]),
+                    frame_size,
+                    frame_rate,
+                    output_dir,
+                    base_name,
+                    encoder_args
                 )
-                output_files.append(str(output_path))
                 
+            output_path = output_dir / f"{base_name}_part1.mp4"
+            frame_count = VideoConverter._pipe_frames_to_ffmpeg(
+                read_frames(VideoConverter.apply_effects(frames, loop_video, reverse_video)),
+                frame_size,
+                frame_rate,
+                output_path,
+                encoder_args
+            )
+            logging.info(f"Created video {output_path} with {frame_count} frames")
+            output_files.append(str(output_path))
+                
+        except subprocess.CalledProcessError as e:
+            logging.error(f"FFmpeg encode failed (code {e.returncode}): {e.stderr}")
+            output_files = None
         except Exception as e:
             logging.error(f"Conversion failed: {e}")
             output_files = None
         finally:
-            shutil.rmtree(temp_dir, ignore_errors=True)
+            if temp_dir:
+                shutil.rmtree(temp_dir, ignore_errors=True)
             
         return output_files
     
+    @staticmethod
+    def _video_stream_signature(video_file: str) -> Optional[str]:
+        """FFmpeg's description of the first video stream without its bitrate (None if unreadable)."""
+        # Without an output FFmpeg exits non-zero after printing the input info
+        result = subprocess.run(['ffmpeg', '-hide_banner', '-i', str(video_file)], capture_output=True, text=True)
+        match = re.search(r'Video: (.*)', result.stderr)
+        return _BITRATE_RE.sub('', match.group(1)).strip() if match else None
+        
     @staticmethod
     def merge_videos(
         video_files: List[str],
         output_path: str,
-        frame_rate: int = 20
+        frame_rate: int = 20,
+        codec: Optional[str] = None,
+        encoder_preset: Optional[str] = None
     ) -> bool:
         """
         Merges multiple video files into one using FFmpeg's lossless concatenation.
         
+        Inputs whose video streams differ (codec, size, pixel format, time base)
+        cannot be stream copied and are re-encoded by the same FFmpeg call, as
+        is a copy that FFmpeg rejects.
+        
         Args:
             video_files: List of video files to merge
             output_path: Path for merged output
             frame_rate: Not used (kept for compatibility)
+            codec: FFmpeg video encoder for a re-encode (None = fastest available)
+            encoder_preset: Encoder speed preset for a re-encode (None = codec default)
         
         Returns:
             True if merge succeeded, False otherwise
@@ -258,28 +917,42 @@ class VideoConverter:
         try:
             # Create temporary file listing inputs
             list_file = Path(output_path).with_suffix('.txt')
+            entries = [f"file '{Path(file).absolute()}'\n" for file in video_files]
             with open(list_file, 'w') as f:
-                for file in video_files:
-                    f.write(f"file '{Path(file).absolute()}'\n")
-            
-            # FFmpeg command for lossless concatenation
-            cmd = [
-                'ffmpeg',
-                '-f', 'concat',
-                '-safe', '0',
-                '-i', str(list_file),
-                '-c', 'copy',  # No re-encoding
-                '-y',  # Overwrite output
-                str(output_path)
-            ]
-            
-            logging.info("Performing lossless merge with FFmpeg...")
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-            
-            if result.returncode != 0:
-                logging.error(f"FFmpeg failed: {result.stderr}")
-                return False
+                f.writelines(entries)
+            
+            # Stream copy is only safe when every input has the same MP4 video stream
+            signatures = {VideoConverter._video_stream_signature(file) for file in video_files}
+            can_copy = (
+                all(Path(file).suffix.lower() == '.mp4' for file in video_files)
+                and len(signatures) == 1
+                and None not in signatures
+            )
+            if can_copy:
+                logging.info("Performing lossless merge with FFmpeg...")
+            else:
+                logging.info("Input streams differ, re-encoding merge with FFmpeg...")
                 
+            def concat_cmd(codec_args: List[str]) -> List[str]:
+                return [
+                    'ffmpeg',
+                    '-f', 'concat',
+                    '-safe', '0',
+                    '-i', str(list_file),
+                    *codec_args,
+                    *MP4_MUX_ARGS,
+                    '-y',  # Overwrite output
+                    str(output_path)
+                ]
+                
+            if can_copy:
+                try:
+                    subprocess.run(concat_cmd(['-c', 'copy']), check=True, capture_output=True, text=True)  # No re-encoding
+                    return True
+                except subprocess.CalledProcessError as e:
+                    logging.warning(f"Lossless merge failed, re-encoding instead: {e.stderr}")
+                    
+            subprocess.run(concat_cmd(VideoConverter.encoder_args(codec, encoder_preset)), check=True, capture_output=True, text=True)
             return True
             
         except subprocess.CalledProcessError as e:
@@ -343,33 +1016,71 @@ def main():
         action="store_true",
         help="Reverse the video playback"
     )
+    parser.add_argument(
+        "--codec",
+        help="FFmpeg video encoder, e.g. libx264 (default: GPU encoder if usable, else libsvtav1 or libx264)"
+    )
+    parser.add_argument(
+        "--preset",
+        help="Encoder speed preset (default: fastest preset of the codec)"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=max(1, (os.cpu_count() or 1) // 2),
+        help="Number of files to convert in parallel (default: half the CPU cores, at most 2 with a GPU encoder)"
+    )
     
     args = parser.parse_args()
     configure_logging(args.log)
     logging.info(f"Starting conversion with parameters: {vars(args)}")
     
     # Find input files if not specified
-    input_files = args.input_files if args.input_files else glob.glob("*.[wW][eE][bB][pP]")
+    input_files = args.input_files if args.input_files else sorted(glob.glob("*.[wW][eE][bB][pP]"), key=natural_sort_key)
     if not input_files:
         logging.error("No input files found")
         return
         
-    # Process each file
-    processed_files = []
+    # Skip missing files up front so workers only get real work
+    existing_files = []
     for file in input_files:
         if not Path(file).exists():
             logging.warning(f"File not found: {file}")
             continue
+        existing_files.append(file)
         
-        result = VideoConverter.convert_to_mp4(
-            file,
-            frame_rate=args.fps,
-            split_ratio=args.percent,
-            output_dir=args.output,
-            loop_video=args.loop,
-            reverse_video=args.reverse
-        )
+    jobs = max(1, min(args.jobs, len(existing_files)))
+    cpu_count = os.cpu_count() or 1
+    codec = args.codec or VideoConverter.select_codec()
+    if codec in HARDWARE_CODECS and jobs > MAX_HARDWARE_JOBS:
+        logging.warning(f"Limiting to {MAX_HARDWARE_JOBS} parallel jobs, {codec} allows only a few encode sessions")
+        jobs = MAX_HARDWARE_JOBS
+    convert = functools.partial(
+        VideoConverter.convert_to_mp4,
+        frame_rate=args.fps,
+        split_ratio=args.percent,
+        output_dir=args.output,
+        loop_video=args.loop,
+        reverse_video=args.reverse,
+        codec=codec,
+        encoder_preset=args.preset,
+        # Share cores between concurrent encoders instead of oversubscribing
+        threads=0 if jobs == 1 else max(1, cpu_count // jobs)
+    )
+    
+    # Process each file, results keep input order for merging
+    if jobs > 1:
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=configure_logging,
+            initargs=(args.log,)
+        ) as executor:
+            results = list(executor.map(convert, existing_files))
+    else:
+        results = [convert(file) for file in existing_files]
         
+    processed_files = []
+    for result in results:
         if result:
             processed_files.extend(result)
             
@@ -379,7 +1090,13 @@ def main():
         if args.output and not output_path.is_absolute():
             output_path = Path(args.output) / output_path
         
-        if not VideoConverter.merge_videos(processed_files, str(output_path), args.fps):
+        if not VideoConverter.merge_videos(
+            processed_files,
+            str(output_path),
+            args.fps,
+            codec=codec,
+            encoder_preset=args.preset
+        ):
             logging.error("Failed to merge videos")
             
     logging.info("Processing complete")